@@ -1,14 +1,28 @@
-import json
+import os
+import sys
+import logging
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 import time
+import random
+import threading
 import datetime as dt
 import csv
+import sqlite3
+from bisect import bisect_right
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import NamedTuple
 
+log = logging.getLogger(__name__)
 
-with open("config.json") as f:
-    config = json.load(f)
+
+with open("config.json", "rb") as f:
+    config = orjson.loads(f.read())
 
 CLIENT_ID = config["client_id"]
 CLIENT_SECRET = config["client_secret"]
@@ -16,6 +30,13 @@ USERNAME = config["username"]
 PASSWORD = config["password"]
 USER_AGENT = config["user_agent"]
 
+# One session for the whole run so every request reuses pooled keep-alive connections
+SESSION = requests.Session()
+# Listing pages are large JSON documents; make sure they come back compressed
+SESSION.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"})
+SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0))
+REQUEST_TIMEOUT = (5, 30)  # (connect, read) seconds
+
 auth = HTTPBasicAuth(CLIENT_ID, CLIENT_SECRET)
 data = {
     "grant_type": "password",
@@ -23,53 +44,278 @@ data = {
     "password": PASSWORD,
     "scope": "read identity",
 }
-headers = {"User-Agent": USER_AGENT}
 
-r = requests.post("https://www.reddit.com/api/v1/access_token",
-                  auth=auth, data=data, headers=headers)
-r.raise_for_status()
-token = r.json()["access_token"]
+# Tokens last an hour; keep the current one on disk so reruns skip the password grant
+TOKEN_CACHE = Path(".reddit_token.json")
+TOKEN_LOCK = threading.Lock()
 
-oauth_headers = {
-    "Authorization": f"bearer {token}",
-    "User-Agent": USER_AGENT,
-}
+
+def request_token():
+    """Password-grant a new bearer token and cache it until shortly before it expires"""
+    r = SESSION.post("https://www.reddit.com/api/v1/access_token",
+                     auth=auth, data=data, timeout=REQUEST_TIMEOUT)
+    r.raise_for_status()
+    payload = orjson.loads(r.content)
+    token = payload["access_token"]
+    cached = {
+        "username": USERNAME,
+        "client_id": CLIENT_ID,
+        "access_token": token,
+        "expires_at": time.time() + payload.get("expires_in", 3600) - 60,
+    }
+    # Create the file owner-only so the token is never readable by others
+    fd = os.open(TOKEN_CACHE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(orjson.dumps(cached))
+    os.chmod(TOKEN_CACHE, 0o600)
+    return token
+
+
+def load_cached_token():
+    """The cached token if it belongs to the configured account and has not expired, else None"""
+    try:
+        cached = orjson.loads(TOKEN_CACHE.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+    if (cached.get("username") != USERNAME or cached.get("client_id") != CLIENT_ID
+            or time.time() >= cached.get("expires_at", 0)):
+        return None
+    return cached.get("access_token")
+
+
+def set_token(token):
+    # Bind the bearer token to the session once instead of passing headers to every call
+    SESSION.headers.update({"Authorization": f"bearer {token}"})
+
+
+def refresh_token(rejected_auth):
+    """Replace a token the API rejected; threads that hit the same 401 share one refresh"""
+    with TOKEN_LOCK:
+        if SESSION.headers.get("Authorization") == rejected_auth:
+            set_token(request_token())
+
+
+set_token(load_cached_token() or request_token())
+
+
+# Upper bound on simultaneous requests across all worker threads
+MAX_CONCURRENT_REQUESTS = 8
+# Reddit allows 100 queries per minute per OAuth client; stay just under it
+MAX_REQUESTS_PER_MINUTE = 95
+# One generator for all retry/pacing jitter rather than the module-level random state
+JITTER = random.Random()
+
+
+class AdaptiveLimiter:
+    """Concurrency cap shared by all worker threads, sized AIMD-style like TCP congestion control
+
+    The limit grows by ~1 slot per limit's worth of successful responses and halves whenever
+    Reddit throttles us (429) or reports that the remaining quota is running low.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=MAX_CONCURRENT_REQUESTS):
+        self.cond = threading.Condition()
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+
+    def __enter__(self):
+        with self.cond:
+            self.cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify()
+        return False
+
+    def grow(self):
+        with self.cond:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.cond.notify_all()
+
+    def shrink(self):
+        with self.cond:
+            self.limit = max(self.minimum, self.limit / 2)
 
 
-def get_with_backoff(url, headers, params=None, tries=5):
+REQUEST_LIMITER = AdaptiveLimiter()
+
+
+class RateState:
+    """Latest x-ratelimit-* values reported by Reddit, shared by all worker threads"""
+
+    def __init__(self, low_water=10, max_delay=2):
+        self.lock = threading.Lock()
+        self.low_water = low_water  # start pacing once remaining drops below this
+        self.max_delay = max_delay
+        self.used = None
+        self.remaining = None
+        self.reset = None
+        self.exhausted_seen = False  # set once the current exhausted reading has paused everyone
+        self.calls = 0  # successful API responses, for the end-of-run summary
+
+    def is_low(self):
+        with self.lock:
+            return self.remaining is not None and self.remaining < self.low_water
+
+    def pacing_delay(self):
+        """Seconds to wait so the remaining quota is spread evenly until the window resets, capped at max_delay"""
+        with self.lock:
+            if self.remaining is None or self.reset is None or self.remaining >= self.low_water:
+                return 0
+            return min(self.max_delay, max(0, self.reset / max(1, self.remaining)))
+
+    def exhausted_wait(self):
+        """Seconds until the window resets if the quota is all but gone (under 2 requests)
+
+        Returned only once per reading, so the wait is applied once for all threads rather
+        than added again by every thread that reserves a slot.
+        """
+        with self.lock:
+            if self.remaining is None or self.reset is None or self.remaining >= 2 or self.exhausted_seen:
+                return 0
+            self.exhausted_seen = True
+            return self.reset + JITTER.random()
+
+
+RATE_STATE = RateState()
+
+
+class MinuteBudget:
+    """Spaces request starts evenly so all threads together stay under a per-minute cap
+
+    When Reddit reports the quota running low, the spacing widens to spread what is
+    left of it until the window resets (RateState.pacing_delay). Once it is all but
+    gone, every thread is held until the reset before the next slot is handed out.
+    """
+
+    def __init__(self, per_minute=MAX_REQUESTS_PER_MINUTE, rate_state=RATE_STATE):
+        self.lock = threading.Lock()
+        self.interval = 60 / per_minute
+        self.rate_state = rate_state
+        self.next_slot = 0.0
+
+    def wait(self):
+        hold = self.rate_state.exhausted_wait()
+        if hold:
+            self.pause(hold)
+        interval = max(self.interval, self.rate_state.pacing_delay())
+        # Reserve the next free slot under the lock, then sleep outside it
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def pause(self, seconds):
+        """Hold back every thread's next request for `seconds`, e.g. after a 429"""
+        with self.lock:
+            self.next_slot = max(self.next_slot, time.monotonic() + seconds)
+
+
+REQUEST_BUDGET = MinuteBudget()
+
+
+def get_with_backoff(url, params=None, tries=5):
+    reauthenticated = False
     for t in range(tries):
-        resp = requests.get(url, headers=headers, params=params)
+        REQUEST_BUDGET.wait()
+        sent_auth = SESSION.headers.get("Authorization")
+        try:
+            with REQUEST_LIMITER:
+                resp = SESSION.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            if t == tries - 1:
+                raise
+            time.sleep(_retry_delay(t))
+            continue
+        if resp.status_code == 401 and not reauthenticated:
+            # Cached or expired token; get a fresh one and retry once
+            refresh_token(sent_auth)
+            reauthenticated = True
+            continue
+        if resp.status_code >= 500:
+            # Reddit returns transient 500/503s under load; retry rather than abandon the walk
+            if t < tries - 1:
+                time.sleep(_retry_delay(t))
+            continue
         if resp.status_code != 429:
             resp.raise_for_status()
+            update_rate_state(resp)
+            if RATE_STATE.is_low():
+                REQUEST_LIMITER.shrink()
+            else:
+                REQUEST_LIMITER.grow()
             return resp
-        retry_after = int(resp.headers.get("retry-after", "2"))
-        time.sleep(retry_after if retry_after > 0 else 2 * (t + 1))
+        REQUEST_LIMITER.shrink()
+        # Wait exactly as long as Reddit asks, or until the quota window resets. The pause
+        # applies to every thread (this one included, via the next wait()), so the others
+        # don't keep sending requests into the same 429
+        retry_after = _header_float(resp, "retry-after") or _header_float(resp, "x-ratelimit-reset")
+        REQUEST_BUDGET.pause(retry_after if retry_after else _retry_delay(t))
     resp.raise_for_status()
 
 
-def show_rate(resp):
-    used  = resp.headers.get("x-ratelimit-used")
-    rem   = resp.headers.get("x-ratelimit-remaining")
-    reset = resp.headers.get("x-ratelimit-reset")
-    print(f"Rate — Used: {used}, Remaining: {rem}, Reset(min): {reset}")
+def _retry_delay(attempt):
+    # Capped exponential backoff; the jitter keeps concurrent workers from retrying in lockstep
+    return min(60, 2 ** attempt) + JITTER.uniform(0, 1)
+
+
+def _header_float(resp, name):
+    value = resp.headers.get(name)
+    return float(value) if value is not None else None
+
 
+def update_rate_state(resp, state=RATE_STATE):
+    used = _header_float(resp, "x-ratelimit-used")
+    rem = _header_float(resp, "x-ratelimit-remaining")
+    reset = _header_float(resp, "x-ratelimit-reset")
+    with state.lock:
+        state.used, state.remaining, state.reset = used, rem, reset
+        state.exhausted_seen = False
+        state.calls += 1
+    # Once per response, so only log it when debugging rather than printing it
+    log.debug("Rate used=%s remaining=%s reset(s)=%s", used, rem, reset)
 
+
+@lru_cache(maxsize=None)
 def to_epoch_start(date_str: str) -> int:
-    return int(dt.datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=dt.timezone.utc).timestamp())
+    return int(dt.datetime.fromisoformat(date_str).replace(tzinfo=dt.timezone.utc).timestamp())
 
 
+@lru_cache(maxsize=None)
 def to_epoch_end(date_str: str) -> int:
-    base = dt.datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=dt.timezone.utc)
+    base = dt.datetime.fromisoformat(date_str).replace(tzinfo=dt.timezone.utc)
     return int((base + dt.timedelta(days=1, seconds=-1)).timestamp())
 
 
-def fetch_post_comments(subreddit, post_id, headers, num_comments=3):
+def epoch_to_date(ts) -> str:
+    # Posts in a run share a few hundred distinct days, so format each day only once
+    return _day_to_date(int(ts) // 86400)
+
+
+@lru_cache(maxsize=1024)
+def _day_to_date(day: int) -> str:
+    tm = time.gmtime(day * 86400)
+    return f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}"
+
+
+COMMENT_MAX_CHARS = 500  # comment bodies are cut to this length in the CSV
+
+
+def fetch_post_comments(subreddit, post_id, num_comments=3):
     """Fetch comments for a specific post and return top N with different vote ranges"""
     comments_url = f"https://oauth.reddit.com/r/{subreddit}/comments/{post_id}"
     
     try:
-        resp = get_with_backoff(comments_url, headers, params={"limit": 100, "sort": "top"})
-        data = resp.json()
+        # depth=1: only top-level comments are considered, so don't download reply trees
+        resp = get_with_backoff(comments_url, params={"limit": 100, "depth": 1, "sort": "top", "raw_json": 1})
+        data = orjson.loads(resp.content)
         
         # Reddit returns [post_data, comments_data]
         if len(data) < 2:
@@ -85,7 +331,7 @@ def fetch_post_comments(subreddit, post_id, headers, num_comments=3):
                 # Skip AutoModerator and deleted comments
                 if comment_data.get("author") not in ["AutoModerator", "[deleted]", None]:
                     valid_comments.append({
-                        "content": comment_data.get("body", ""),
+                        "content": comment_data.get("body", "")[:COMMENT_MAX_CHARS],
                         "score": comment_data.get("score", 0),
                         "author": comment_data.get("author", "")
                     })
@@ -93,10 +339,7 @@ def fetch_post_comments(subreddit, post_id, headers, num_comments=3):
         if not valid_comments:
             return get_empty_comments(num_comments)
         
-        # Sort by score to get different ranges
-        valid_comments.sort(key=lambda x: x["score"], reverse=True)
-        
-        # Select comments with different vote ranges
+        # Select comments with different vote ranges (select_diverse_comments sorts them by score)
         selected_comments = select_diverse_comments(valid_comments, num_comments)
         
         return selected_comments
@@ -112,7 +355,7 @@ def select_diverse_comments(comments, num_comments=3):
         return get_empty_comments(num_comments)
     
     # Sort by score (highest first)
-    comments.sort(key=lambda x: x["score"], reverse=True)
+    comments.sort(key=itemgetter("score"), reverse=True)
     
     # Initialize selected comments structure
     selected = get_empty_comments(num_comments)
@@ -120,27 +363,25 @@ def select_diverse_comments(comments, num_comments=3):
     # Fill available slots based on number of comments available
     available_comments = min(len(comments), num_comments)
     
-    for i in range(available_comments):
-        comment_key_content = f"comment_{get_number_word(i+1)}_content"
-        comment_key_votes = f"comment_{get_number_word(i+1)}_votes"
+    for i, (comment_key_content, comment_key_votes) in enumerate(comment_keys(available_comments)):
         
         if available_comments == 1:
             # Only one comment
-            selected[comment_key_content] = comments[0]["content"][:500]
+            selected[comment_key_content] = comments[0]["content"]
             selected[comment_key_votes] = comments[0]["score"]
         elif available_comments == 2:
             # Two comments - highest and lowest
             if i == 0:
-                selected[comment_key_content] = comments[0]["content"][:500]
+                selected[comment_key_content] = comments[0]["content"]
                 selected[comment_key_votes] = comments[0]["score"]
             else:
-                selected[comment_key_content] = comments[-1]["content"][:500]
+                selected[comment_key_content] = comments[-1]["content"]
                 selected[comment_key_votes] = comments[-1]["score"]
         else:
             # Three or more comments - distribute across vote ranges
             if i == 0:
                 # Highest voted
-                selected[comment_key_content] = comments[0]["content"][:500]
+                selected[comment_key_content] = comments[0]["content"]
                 selected[comment_key_votes] = comments[0]["score"]
             elif i == available_comments - 1:
                 # Lowest voted
@@ -150,12 +391,12 @@ def select_diverse_comments(comments, num_comments=3):
                         if comments[j]["score"] >= -1:
                             lowest_idx = j
                             break
-                selected[comment_key_content] = comments[lowest_idx]["content"][:500]
+                selected[comment_key_content] = comments[lowest_idx]["content"]
                 selected[comment_key_votes] = comments[lowest_idx]["score"]
             else:
                 # Middle range comments - distribute evenly
                 mid_idx = int((len(comments) - 1) * (i / (available_comments - 1)))
-                selected[comment_key_content] = comments[mid_idx]["content"][:500]
+                selected[comment_key_content] = comments[mid_idx]["content"]
                 selected[comment_key_votes] = comments[mid_idx]["score"]
     
     return selected
@@ -163,163 +404,226 @@ def select_diverse_comments(comments, num_comments=3):
 
 def get_empty_comments(num_comments=3):
     """Return empty comment structure when no comments found"""
+    # Callers fill the slots in, so hand out a copy of the cached template
+    return _empty_comments_template(num_comments).copy()
+
+
+@lru_cache(maxsize=None)
+def _empty_comments_template(num_comments):
     empty_data = {}
-    for i in range(1, num_comments + 1):
-        empty_data[f"comment_{get_number_word(i)}_content"] = ""
-        empty_data[f"comment_{get_number_word(i)}_votes"] = 0
+    for content_key, votes_key in comment_keys(num_comments):
+        empty_data[content_key] = ""
+        empty_data[votes_key] = 0
     return empty_data
 
 
+@lru_cache(maxsize=None)
+def comment_keys(num_comments):
+    """(content, votes) column names for comment slots 1..num_comments"""
+    return tuple(
+        (f"comment_{get_number_word(i)}_content", f"comment_{get_number_word(i)}_votes")
+        for i in range(1, num_comments + 1)
+    )
+
+
+NUMBER_WORDS = ("", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten")
+
+
 def get_number_word(num):
     """Convert number to word (1->one, 2->two, etc.)"""
-    words = ["", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"]
     if 1 <= num <= 10:
-        return words[num]
+        return NUMBER_WORDS[num]
     else:
         return str(num)  # fallback for numbers > 10
 
 
+REDDIT_URL_PREFIX = "https://reddit.com"
+
+
+class Post(NamedTuple):
+    """One collected post; fields are in CSV column order so a Post can be written as-is"""
+    post_id: str
+    post_title: str
+    username: str
+    created_utc_unix: float
+    votes: int
+    reddit_url: str
+    subreddit: str
+    post_content: str
+    is_text: bool
+    url_post: str
+    comments: int
+    created_date: str
+
+
 def format_post_data(post_data):
     """Standardize post data format regardless of source"""
-    d = post_data
+    g = post_data.get  # bound once; this runs for every post kept
+    is_self = g("is_self", False)
+    url = g("url")
+    created = g("created_utc")
     
     # Get post content - handle different post types
     post_content = ""
-    if d.get("is_self", False):  # Text post
-        post_content = d.get("selftext", "")
-    elif d.get("url"):  # Link post
-        post_content = f"Link post: {d.get('url')}"
-    
-    return {
-        "post_id": d.get("id"),
-        "post_title": d.get("title"),
-        "username": d.get("author"),
-        "created_utc_unix": d.get("created_utc"),
-        "votes": d.get("score"),
-        "reddit_url": f"https://reddit.com{d.get('permalink')}",
-        "subreddit": d.get("subreddit"),
-        "post_content": post_content,
-        "is_text": d.get("is_self", False),
-        "url_post": d.get("url", ""),
-        "comments": d.get("num_comments", 0),
-        "created_date": dt.datetime.fromtimestamp(d.get("created_utc", 0), dt.timezone.utc).strftime("%Y-%m-%d") if d.get("created_utc") else ""
-    }
+    if is_self:  # Text post
+        post_content = g("selftext", "")
+    elif url:  # Link post
+        post_content = f"Link post: {url}"
+    
+    return Post(
+        post_id=g("id"),
+        post_title=g("title"),
+        username=g("author"),
+        created_utc_unix=created or 0,
+        votes=g("score"),
+        reddit_url=REDDIT_URL_PREFIX + (g("permalink") or ""),
+        subreddit=sys.intern(g("subreddit") or ""),  # a handful of distinct values, share one copy each
+        post_content=post_content,
+        is_text=is_self,
+        url_post=g("url", ""),
+        comments=g("num_comments", 0),
+        created_date=epoch_to_date(created) if created else ""
+    )
+
+
+def iter_listing_pages(url, params, max_pages, label="Listing", stop=None):
+    """Yield the children of each page of a Reddit listing, following its `after` cursor
 
-def fetch_posts_via_enhanced_search(subreddit, start_date, end_date, headers, target_posts=1000):
-    """Enhanced search better historical coverage"""
-    start = to_epoch_start(start_date)
-    end = to_epoch_end(end_date)
+    Stops after max_pages, at the last page, once the optional `stop` event is set, or on
+    a request error (which is printed). Callers can also stop by breaking out of the loop.
+    """
+    after = None
+    for _ in range(max_pages):
+        if stop is not None and stop.is_set():
+            return
+        # Fresh dict per page so the caller's params are never mutated
+        page_params = {**params, "after": after} if after else params
+        try:
+            resp = get_with_backoff(url, params=page_params)
+            data = orjson.loads(resp.content).get("data", {})
+        except Exception as e:
+            print(f"    {label} error: {e}")
+            return
+        children = data.get("children", [])
+        if not children:
+            return
+        yield children
+        after = data.get("after")
+        if not after:
+            return
+
+
+# A strategy stops paging once it has seen MIN_IN_RANGE_SAMPLE posts inside the requested
+# dates and fewer than MIN_NEW_RATIO of them were new (the rest were already collected).
+# Posts outside the dates are not counted, so a strategy still paging down towards an
+# older week is never cut off for it
+MIN_IN_RANGE_SAMPLE = 100
+MIN_NEW_RATIO = 0.05
+
+
+def fetch_posts_via_enhanced_search(subreddit, start, end, target_posts=1000, seen_ids=frozenset(),
+                                    max_workers=4):
+    """Enhanced search better historical coverage (start/end are UTC epoch seconds)
+
+    Posts whose id is already in seen_ids (collected by another window or method) are skipped.
+    Up to `max_workers` search strategies are paged concurrently.
+    """
+    start_date = epoch_to_date(start)
+    end_date = epoch_to_date(end)
     
     print(f"  Enhanced Search for r/{subreddit} ({start_date} to {end_date})")
     
     url = f"https://oauth.reddit.com/r/{subreddit}/search"
-    results = []
-    
-    start_year = start_date.split('-')[0]
-    end_year = end_date.split('-')[0]
-    
-    years_in_range = []
-    for year in range(int(start_year), int(end_year) + 1):
-        years_in_range.append(str(year))
+    # The result count is bounded by target_posts, so allocate the list once up front
+    results = [None] * max(0, target_posts)
+    count = 0
+    found_ids = set()  # shared across strategies so cross-strategy duplicates are O(1) to detect
     
+    # Most match-everything queries sorted by new return the same posts, so keep only
+    # three complementary orderings: recency, score (reaches the older tail) and a keyword query
     search_strategies = [
         {"q": "*", "sort": "new", "t": "all"},
-        {"q": "the", "sort": "new", "t": "all"},
-        {"q": "a", "sort": "new", "t": "all"},
-        
-        *[{"q": year, "sort": "new", "t": "all"} for year in years_in_range],
-        
-        {"q": "title:*", "sort": "new", "t": "all"},
-        {"q": "selftext:*", "sort": "new", "t": "all"},
-        
-        {"q": "*", "sort": "relevance", "t": "all"},
-        {"q": "*", "sort": "hot", "t": "all"},
         {"q": "*", "sort": "top", "t": "all"},
-        
-        {"q": "", "sort": "new", "t": "all"},
+        {"q": "the", "sort": "relevance", "t": "all"},
     ]
     
-    for i, strategy in enumerate(search_strategies):
-        if len(results) >= target_posts:
-            break
-            
+    # Strategies run concurrently and share found_ids/results, so guard them with a lock.
+    # `stop` is the single exit sentinel: once set, every strategy stops paging
+    lock = threading.Lock()
+    stop = threading.Event()
+    if target_posts <= 0:
+        stop.set()
+    
+    def run_strategy(i, strategy):
+        nonlocal count
         print(f"    Strategy {i+1}: {strategy}")
         
         params = {
             **strategy,
             "restrict_sr": "true",
             "limit": 100,
+            "raw_json": 1,
         }
         
-        pages = 0
-        after = None
         max_search_pages = 20
         strategy_results = 0
+        in_range = 0
         
-        while pages < max_search_pages and len(results) < target_posts:
-            if after:
-                params["after"] = after
-                
-            try:
-                resp = get_with_backoff(url, headers, params=params)
-                show_rate(resp)
-                data = resp.json().get("data", {})
-                children = data.get("children", [])
-                
-                if not children:
-                    break
-                    
-                for c in children:
-                    d = c["data"]
-                    ts = d.get("created_utc", 0)
-                    if ts is None:
-                        continue
-                        
-                    if start <= ts <= end:
-                        formatted_post = format_post_data(d)
-                        # Avoid duplicates
-                        if not any(p["post_id"] == formatted_post["post_id"] for p in results):
-                            results.append(formatted_post)
-                            strategy_results += 1
-                            
-                    if len(results) >= target_posts:
+        pages_iter = iter_listing_pages(url, params, max_search_pages, f"Strategy {i+1}", stop)
+        for pages, children in enumerate(pages_iter, 1):
+            for c in children:
+                d = c["data"]
+                ts = d.get("created_utc", 0)
+                if ts is None or not start <= ts <= end:
+                    continue
+                in_range += 1
+                # Dedup before formatting so duplicates only cost a set lookup
+                pid = d.get("id")
+                with lock:
+                    if stop.is_set():
                         break
-                
-                after = data.get("after")
-                if not after:
-                    break
-                pages += 1
-                
-                time.sleep(0.1)
-                
-            except Exception as e:
-                print(f"    Strategy {i+1} error: {e}")
+                    if pid in seen_ids or pid in found_ids:
+                        continue
+                    found_ids.add(pid)
+                    results[count] = format_post_data(d)
+                    count += 1
+                    strategy_results += 1
+                    if count >= target_posts:
+                        stop.set()
+            
+            if stop.is_set():
+                break
+            
+            # Stop paging a strategy whose in-range posts are mostly ones already collected
+            if in_range >= MIN_IN_RANGE_SAMPLE and strategy_results / in_range < MIN_NEW_RATIO:
+                print(f"    Strategy {i+1} yield too low, stopping after {pages} pages")
                 break
         
         print(f"    Strategy {i+1} found: {strategy_results} new posts")
-        
-        time.sleep(0.5)
     
-    print(f"    Enhanced search result: {len(results)} posts")
+    # Strategies page through independent result sets, so overlap their requests
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(run_strategy, range(len(search_strategies)), search_strategies))
+    
+    del results[count:]
+    print(f"    Enhanced search result: {count} posts")
     return results
 
 
-def fetch_posts_via_improved_listing(subreddit, start_date, end_date, headers, target_posts=1000):
-    """Improved listing method with different sorting options"""
-    start = to_epoch_start(start_date)
-    end = to_epoch_end(end_date)
-    
+def fetch_posts_via_improved_listing(subreddit, start, end, target_posts=1000, seen_ids=frozenset(),
+                                     sorts=("new", "hot", "top", "rising")):
+    """Improved listing method with different sorting options (start/end are UTC epoch seconds)
+
+    Posts whose id is already in seen_ids (collected by another window or method) are skipped.
+    `sorts` picks which listings to walk, in order.
+    """
     print(f"  Improved Listing for r/{subreddit}")
     
     # Reddit endpoints
-    endpoints = [
-        f"https://oauth.reddit.com/r/{subreddit}/new",
-        f"https://oauth.reddit.com/r/{subreddit}/hot", 
-        f"https://oauth.reddit.com/r/{subreddit}/top",
-        f"https://oauth.reddit.com/r/{subreddit}/rising"
-    ]
+    endpoints = [f"https://oauth.reddit.com/r/{subreddit}/{sort}" for sort in sorts]
     
     all_results = []
+    found_ids = set()  # duplicates across endpoints, checked in O(1)
     
     for endpoint in endpoints:
         if len(all_results) >= target_posts:
@@ -327,58 +631,41 @@ def fetch_posts_via_improved_listing(subreddit, start_date, end_date, headers, t
             
         print(f"    Trying endpoint: {endpoint.split('/')[-1]}")
         
-        params = {"limit": 100, "t": "all"} if "top" in endpoint else {"limit": 100}
-        after = None
-        pages = 0
+        params = {"limit": 100, "raw_json": 1}
+        if "top" in endpoint:
+            params["t"] = "all"
         max_pages = 50  # More pages for historical data
+        newest_first = endpoint.endswith("/new")
         
-        while pages < max_pages and len(all_results) < target_posts:
-            if after:
-                params["after"] = after
+        for pages, children in enumerate(iter_listing_pages(endpoint, params, max_pages, "Endpoint")):
+            # /new is ordered newest first, so a page whose oldest post is still after `end`
+            # has nothing in range and can be skipped with one comparison
+            if newest_first and (children[-1]["data"].get("created_utc") or 0) > end:
+                continue
             
-            try:
-                resp = get_with_backoff(endpoint, headers, params=params)
-                show_rate(resp)
-                data = resp.json().get("data", {})
-                children = data.get("children", [])
+            found_in_range = False
+            for c in children:
+                d = c["data"]
+                ts = d.get("created_utc", 0)
+                if ts is None:
+                    continue
+                                    
+                # Everything after this post is older still, so stop at the first one before the range
+                if newest_first and ts < start:
+                    print(f"    Reached date limit at page {pages}")
+                    return all_results
                 
-                if not children:
-                    break
-
-                found_in_range = False
-                for c in children:
-                    d = c["data"]
-                    ts = d.get("created_utc", 0)
-                    if ts is None:
-                        continue
-                                        
-                    if "new" in endpoint and ts < start:
-                        print(f"    Reached date limit at page {pages}")
-                        return all_results
+                # Collect posts within date range    
+                pid = d.get("id")
+                if start <= ts <= end and pid not in seen_ids and pid not in found_ids:
+                    found_ids.add(pid)
+                    all_results.append(format_post_data(d))
+                    found_in_range = True
                     
-                    # Collect posts within date range    
-                    if start <= ts <= end:
-                        formatted_post = format_post_data(d)
-                        # Avoid duplicates across endpoints
-                        if not any(p["post_id"] == formatted_post["post_id"] for p in all_results):
-                            all_results.append(formatted_post)
-                            found_in_range = True
-                            
-                            if len(all_results) >= target_posts:
-                                return all_results
-                
-                if not found_in_range and pages > 10:
-                    break
-
-                after = data.get("after")
-                if not after:
-                    break
-                pages += 1
-                
-                time.sleep(0.1)
-                
-            except Exception as e:
-                print(f"    Endpoint error: {e}")
+                    if len(all_results) >= target_posts:
+                        return all_results
+            
+            if not found_in_range and pages > 10:
                 break
         
         print(f"    Endpoint {endpoint.split('/')[-1]}: {len(all_results)} total posts so far")
@@ -387,102 +674,260 @@ def fetch_posts_via_improved_listing(subreddit, start_date, end_date, headers, t
     return all_results
 
 
-def collect_posts_weekly_windows(subreddit, start_date, end_date, headers, target_posts=1000):
-    """Collect posts using weekly time windows for better temporal distribution"""
+def fetch_candidate_ids_from_comments(subreddit, seen_ids=frozenset(), max_pages=10):
+    """Ids of posts that received recent comments in a subreddit, excluding ones already in seen_ids
+
+    Recently commented posts can be older than anything still reachable through /new,
+    so this is a cheap source of ids for fetch_posts_by_ids.
+    """
+    url = f"https://oauth.reddit.com/r/{subreddit}/comments"
+    params = {"limit": 100, "raw_json": 1}
+    candidate_ids = {}  # dict keeps first-seen order
+    
+    for children in iter_listing_pages(url, params, max_pages, "Comment listing"):
+        for c in children:
+            link_id = c["data"].get("link_id") or ""
+            pid = link_id[3:]  # strip the "t3_" prefix
+            if pid and pid not in seen_ids:
+                candidate_ids[pid] = None
+    
+    return list(candidate_ids)
+
+
+def fetch_posts_by_ids(post_ids, start, end, target_posts=1000, seen_ids=frozenset()):
+    """Look up posts by id via /api/info, 100 per request, keeping those between start and end"""
+    url = "https://oauth.reddit.com/api/info"
+    results = []
+    post_ids = [pid for pid in post_ids if pid not in seen_ids]
+    
+    for i in range(0, len(post_ids), 100):
+        if len(results) >= target_posts:
+            break
+        chunk = post_ids[i:i + 100]
+        try:
+            resp = get_with_backoff(url, params={"id": ",".join(f"t3_{pid}" for pid in chunk), "raw_json": 1})
+            children = orjson.loads(resp.content).get("data", {}).get("children", [])
+        except Exception as e:
+            print(f"    Info lookup error: {e}")
+            continue
+        
+        for c in children:
+            d = c["data"]
+            ts = d.get("created_utc")
+            if ts is not None and start <= ts <= end:
+                results.append(format_post_data(d))
+    
+    print(f"    Id lookup result: {len(results[:target_posts])} posts from {len(post_ids)} candidates")
+    return results[:target_posts]
+
+
+def fetch_newest_post_time(subreddit):
+    """created_utc of the subreddit's newest post (one limit=1 request), or None if unknown"""
+    try:
+        resp = get_with_backoff(f"https://oauth.reddit.com/r/{subreddit}/new", params={"limit": 1, "raw_json": 1})
+        children = orjson.loads(resp.content).get("data", {}).get("children", [])
+    except Exception as e:
+        print(f"    Newest-post probe error: {e}")
+        return None
+    return children[0]["data"].get("created_utc") if children else None
+
+
+def collect_posts_weekly_windows(subreddit, start_date, end_date, target_posts=1000, max_workers=4, seen_ids=None):
+    """Collect posts using weekly time windows for better temporal distribution
+
+    Ids of every collected post are added to `seen_ids` so the caller can keep deduplicating against it.
+    """
     print(f"\n--- Weekly collection strategy for r/{subreddit} ---")
     print(f"Date range: {start_date} to {end_date}")
     
     # Create weekly windows
-    start_dt = dt.datetime.strptime(start_date, "%Y-%m-%d")
-    end_dt = dt.datetime.strptime(end_date, "%Y-%m-%d")
+    start_dt = dt.date.fromisoformat(start_date)
+    end_dt = dt.date.fromisoformat(end_date)
     
     current = start_dt
     windows = []
     
     while current < end_dt:
         window_end = min(current + dt.timedelta(days=7), end_dt)
+        window_start_str = current.isoformat()
+        window_end_str = window_end.isoformat()
         windows.append({
-            "start": current.strftime("%Y-%m-%d"),
-            "end": window_end.strftime("%Y-%m-%d")
+            "start": window_start_str,
+            "end": window_end_str,
+            "start_epoch": to_epoch_start(window_start_str),
+            "end_epoch": to_epoch_end(window_end_str),
+            "window_num": len(windows) + 1
         })
         current = window_end + dt.timedelta(days=1)
     
     posts_per_window = max(10, target_posts // len(windows))
     print(f"  Created {len(windows)} weekly windows, ~{posts_per_window} posts each")
     
-    all_posts = []
+    # One id set for the whole subreddit, shared by every window and fetch method,
+    # so fetchers can skip known posts before formatting them
+    if seen_ids is None:
+        seen_ids = set()
     
-    for i, window in enumerate(windows):
-        print(f"\n  Week {i+1}: {window['start']} to {window['end']}")
-        
+    # /new is ordered by time, so a single walk from the newest post back to the start
+    # of the range covers every week; walking it once per window would re-read the
+    # same leading pages each time. The walk is not capped at target_posts, otherwise
+    # only the newest weeks would be filled; Reddit stops serving a listing after
+    # ~1000 posts anyway
+    listing_posts = fetch_posts_via_improved_listing(
+        subreddit, windows[0]["start_epoch"], windows[-1]["end_epoch"], sys.maxsize, seen_ids, sorts=("new",)
+    )
+    
+    # Bucket the listing posts by window, keeping at most posts_per_window per week
+    window_starts = [w["start_epoch"] for w in windows]
+    buckets = [[] for _ in windows]
+    for post in listing_posts:
+        idx = bisect_right(window_starts, post.created_utc_unix) - 1
+        if idx >= 0 and post.created_utc_unix <= windows[idx]["end_epoch"] and len(buckets[idx]) < posts_per_window:
+            buckets[idx].append(post)
+    for bucket in buckets:
+        seen_ids.update(p.post_id for p in bucket)
+    
+    # Weeks that start after the subreddit's newest post cannot have any posts to search for.
+    # The walk's newest post already rules out the weeks up to it, so only probe when a
+    # short week lies beyond it
+    newest_ts = listing_posts[0].created_utc_unix if listing_posts else None
+    if any(len(bucket) < posts_per_window and (newest_ts is None or window["start_epoch"] > newest_ts)
+           for window, bucket in zip(windows, buckets)):
+        newest_ts = fetch_newest_post_time(subreddit)
+    
+    # Search is only the fallback for weeks /new could not fill (usually the older ones)
+    def top_up_window(item):
+        window, bucket = item
+        missing = posts_per_window - len(bucket)
+        if missing <= 0:
+            return bucket
+        if newest_ts is not None and newest_ts < window["start_epoch"]:
+            return bucket
         week_posts = fetch_posts_via_enhanced_search(
-            subreddit, window['start'], window['end'], headers, posts_per_window
+            subreddit, window['start_epoch'], window['end_epoch'], missing, seen_ids
         )
-        
-        if len(week_posts) < posts_per_window * 0.3:
-            additional = fetch_posts_via_improved_listing(
-                subreddit, window['start'], window['end'], headers, posts_per_window
-            )
-            
-            # Merge without duplicates
-            existing_ids = {p["post_id"] for p in week_posts}
-            unique_additional = [p for p in additional if p["post_id"] not in existing_ids]
-            week_posts.extend(unique_additional[:posts_per_window - len(week_posts)])
-        
-        all_posts.extend(week_posts)
-        print(f"    Week {i+1} collected: {len(week_posts)} posts")
-        
-        time.sleep(1)
+        seen_ids.update(p.post_id for p in week_posts)
+        if not week_posts:
+            return bucket
+        # The /new bucket is already newest first; search results come in mixed orders
+        return sorted(bucket + week_posts, key=attrgetter("created_utc_unix"), reverse=True)
+    
+    # Windows are independent, so search them concurrently to overlap network latency
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        window_results = list(pool.map(top_up_window, zip(windows, buckets)))
+    
+    for window, week_posts in zip(windows, window_results):
+        print(f"    Week {window['window_num']} ({window['start']} to {window['end']}) collected: {len(week_posts)} posts")
     
-    # Sort by timestamp and limit to target
-    all_posts.sort(key=lambda x: x.get("created_utc_unix", 0), reverse=True)
+    # Windows don't overlap and each one is newest first, so joining them from the newest
+    # window back gives the whole list newest first without a final sort
+    all_posts = [post for week_posts in reversed(window_results) for post in week_posts]
     final_posts = all_posts[:target_posts]
     
     print(f"\n  Weekly strategy result: {len(final_posts)} posts across {len(windows)} weeks")
     return final_posts
 
 
-def enhance_posts_with_comments(posts, headers, num_comments=3):
-    """Add comment data to existing posts - only fetch for posts with comments > 0"""
+def enhance_posts_with_comments(posts, num_comments=3, max_workers=MAX_CONCURRENT_REQUESTS):
+    """Yield (post, comment_data) pairs - only fetch for posts with comments > 0
+
+    Comment threads are fetched concurrently by up to `max_workers` threads, but pairs are
+    still yielded in the order of `posts`.
+    """
     print(f"\n--- Fetching {num_comments} comments per post ---")
     
-    posts_with_comments = [p for p in posts if p.get('comments', 0) > 0]
-    posts_without_comments = [p for p in posts if p.get('comments', 0) == 0]
-    
-    print(f"  Posts with comments: {len(posts_with_comments)}")
-    print(f"  Posts without comments: {len(posts_without_comments)} (skipping)")
+    posts_with_comments = sum(1 for p in posts if p.comments > 0)
+    posts_without_comments = len(posts) - posts_with_comments
     
-    enhanced_posts = []
+    print(f"  Posts with comments: {posts_with_comments}")
+    print(f"  Posts without comments: {posts_without_comments} (skipping)")
     
-    # Process posts with no comments first
-    for post in posts_without_comments:
-        empty_comments = get_empty_comments(num_comments)
-        enhanced_post = {**post, **empty_comments}
-        enhanced_posts.append(enhanced_post)
+    def comments_for(post):
+        if not post.comments:
+            return get_empty_comments(num_comments)
+        log.debug("Processing post %s (%d comments)", post.post_id, post.comments)
+        return fetch_post_comments(post.subreddit, post.post_id, num_comments)
     
-    # Process posts with comments
-    for i, post in enumerate(posts_with_comments):
-        print(f"  Processing post {i+1}/{len(posts_with_comments)}: {post['post_id']} ({post.get('comments', 0)} comments)")
-        
-        comment_data = fetch_post_comments(post['subreddit'], post['post_id'], headers, num_comments)
-        
-        enhanced_post = {**post, **comment_data}
-        enhanced_posts.append(enhanced_post)
-        
-        # Rate limiting
-        if i > 0 and i % 20 == 0:
-            print(f"    Processed {i} posts, brief pause...")
-            time.sleep(1)
-        else:
-            time.sleep(0.2)
+    # pool.map returns results in input order (newest first), so each row can be written
+    # as soon as it and everything before it is ready and the CSV keeps the collection order.
+    # Pacing is handled per request by get_with_backoff and REQUEST_LIMITER
+    i = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for post, comment_data in zip(posts, pool.map(comments_for, posts)):
+            yield post, comment_data
+            
+            if post.comments:
+                i += 1
+                if i % 20 == 0:
+                    print(f"    Processed {i} posts")
     
-    print(f"✓ Enhanced {len(posts_with_comments)} posts with {num_comments} comments each")
-    print(f"✓ Skipped {len(posts_without_comments)} posts with no comments")
-    return enhanced_posts
+    print(f"✓ Enhanced {posts_with_comments} posts with {num_comments} comments each")
+    print(f"✓ Skipped {posts_without_comments} posts with no comments")
+
+
+def open_seen_cache(output_dir):
+    """Open (creating if needed) the on-disk record of the post ids already written to each CSV"""
+    db = sqlite3.connect(Path(output_dir) / "seen.sqlite", timeout=30)
+    # Rows are keyed by CSV file name, since each file covers one subreddit and date range
+    db.execute("CREATE TABLE IF NOT EXISTS seen_rows(csv TEXT, post_id TEXT, PRIMARY KEY(csv, post_id))")
+    # Size and mtime of each CSV when its ids were last recorded, to spot files rewritten since
+    db.execute("CREATE TABLE IF NOT EXISTS seen_files(csv TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER)")
+    return db
+
+
+def _csv_stamp(filepath):
+    st = filepath.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def load_seen_ids(db, filepath):
+    """Ids already written to `filepath`, as a set for O(1) membership checks
+
+    If the CSV changed since its ids were last recorded (overwritten by a non-incremental
+    run, written before the cache existed, or cut short), they are re-read from the CSV.
+    """
+    row = db.execute("SELECT size, mtime_ns FROM seen_files WHERE csv = ?", (filepath.name,)).fetchone()
+    if row != _csv_stamp(filepath):
+        clear_seen_ids(db, filepath)
+        record_seen_ids(db, filepath, read_csv_post_ids(filepath))
+        mark_csv_recorded(db, filepath)
+    return {r[0] for r in db.execute("SELECT post_id FROM seen_rows WHERE csv = ?", (filepath.name,))}
+
+
+def record_seen_ids(db, filepath, post_ids):
+    db.executemany("INSERT OR IGNORE INTO seen_rows(csv, post_id) VALUES (?, ?)",
+                   [(filepath.name, pid) for pid in post_ids])
+    db.commit()
+
+
+def mark_csv_recorded(db, filepath):
+    db.execute("INSERT OR REPLACE INTO seen_files(csv, size, mtime_ns) VALUES (?, ?, ?)",
+               (filepath.name, *_csv_stamp(filepath)))
+    db.commit()
+
+
+def clear_seen_ids(db, filepath):
+    db.execute("DELETE FROM seen_rows WHERE csv = ?", (filepath.name,))
+    db.execute("DELETE FROM seen_files WHERE csv = ?", (filepath.name,))
+    db.commit()
+
+
+def read_csv_post_ids(filepath):
+    """post_id column of a CSV written by an earlier run"""
+    with open(filepath, newline="", encoding="utf-8") as f:
+        return [row["post_id"] for row in csv.DictReader(f) if row.get("post_id")]
 
 
-def scrape_to_csv_comprehensive(subs, global_start, global_end, output_dir="csv_data", posts_per_sub=1000):
-    """Comprehensive scraper optimized for historical data collection with comments"""
+def scrape_to_csv_comprehensive(subs, global_start, global_end, output_dir="csv_data", posts_per_sub=1000,
+                                incremental=False):
+    """Comprehensive scraper optimized for historical data collection with comments
+
+    With incremental=True, new rows are appended to the existing CSV for the same subreddit
+    and date range instead of overwriting it, and posts already in that CSV are skipped before
+    any formatting or comment requests. Their ids are kept per CSV in <output_dir>/seen.sqlite,
+    which only incremental runs open; a CSV that a non-incremental run overwrote is re-read
+    the next time an incremental run appends to it.
+    """
     
     # Start timing
     start_time = time.time()
@@ -494,13 +939,18 @@ def scrape_to_csv_comprehensive(subs, global_start, global_end, output_dir="csv_
     
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     
+    # Parse the global bounds once; fetchers take epoch ints directly
+    global_start_epoch = to_epoch_start(global_start)
+    global_end_epoch = to_epoch_end(global_end)
+    
     # Updated fieldnames to include comment columns
-    fieldnames = [
-        "post_id", "post_title", "username", "created_utc_unix", "votes", "reddit_url", "subreddit",
-        "post_content", "is_text", "url_post", "comments", "created_date",
+    comment_fields = [
         "comment_one_content", "comment_one_votes", "comment_two_content", "comment_two_votes", 
         "comment_three_content", "comment_three_votes"
     ]
+    fieldnames = [*Post._fields, *comment_fields]
+    # Every comment dict has all of these keys, so project them with a C-level getter
+    extract_comments = itemgetter(*comment_fields)
     
     print("\n=== COMPREHENSIVE REDDIT SCRAPER WITH COMMENTS ===")
     print(f"Target period: {global_start} to {global_end}")
@@ -508,74 +958,114 @@ def scrape_to_csv_comprehensive(subs, global_start, global_end, output_dir="csv_
     print(f"Posts per subreddit: {posts_per_sub}")
     print("=" * 60)
     
-    for sub in subs:
+    def collect_one_sub(sub):
         print(f"\n--- Processing r/{sub} ---")
         
+        filename = f"{sub}_data_{global_start}_to_{global_end}.csv"
+        filepath = Path(output_dir) / filename
+        append = incremental and filepath.exists()
+        
+        seen_db = open_seen_cache(output_dir) if incremental else None
+        seen_ids = load_seen_ids(seen_db, filepath) if append else set()
+        if seen_ids:
+            print(f"  Skipping {len(seen_ids)} posts already saved by previous runs")
+        
         # Use weekly collection strategy for better coverage
-        posts = collect_posts_weekly_windows(sub, global_start, global_end, oauth_headers, posts_per_sub)
+        posts = collect_posts_weekly_windows(sub, global_start, global_end, posts_per_sub, seen_ids=seen_ids)
         
         # If still not enough posts, try the enhanced methods
         if len(posts) < posts_per_sub * 0.5:
             print(f"  Insufficient data ({len(posts)} posts). Trying enhanced methods...")
             
-            # Enhanced search
-            additional_search = fetch_posts_via_enhanced_search(
-                sub, global_start, global_end, oauth_headers, posts_per_sub - len(posts)
+            # Posts with recent comments, looked up 100 ids per request; fetchers skip
+            # everything already in seen_ids, so results can be appended without another dedup pass
+            candidate_ids = fetch_candidate_ids_from_comments(sub, seen_ids)
+            additional_info = fetch_posts_by_ids(
+                candidate_ids, global_start_epoch, global_end_epoch, posts_per_sub - len(posts), seen_ids
             )
+            posts.extend(additional_info)
+            seen_ids.update(p.post_id for p in additional_info)
             
-            # Merge without duplicates
-            existing_ids = {p["post_id"] for p in posts}
-            unique_search = [p for p in additional_search if p["post_id"] not in existing_ids]
-            posts.extend(unique_search)
+            # Enhanced search only if the id lookup did not fill the gap
+            if len(posts) < posts_per_sub * 0.5:
+                additional_search = fetch_posts_via_enhanced_search(
+                    sub, global_start_epoch, global_end_epoch, posts_per_sub - len(posts), seen_ids
+                )
+                posts.extend(additional_search)
+                seen_ids.update(p.post_id for p in additional_search)
             
             if len(posts) < posts_per_sub * 0.3:
                 additional_listing = fetch_posts_via_improved_listing(
-                    sub, global_start, global_end, oauth_headers, posts_per_sub - len(posts)
+                    sub, global_start_epoch, global_end_epoch, posts_per_sub - len(posts), seen_ids
                 )
-                
-                existing_ids = {p["post_id"] for p in posts}
-                unique_listing = [p for p in additional_listing if p["post_id"] not in existing_ids]
-                posts.extend(unique_listing)
+                posts.extend(additional_listing)
+                seen_ids.update(p.post_id for p in additional_listing)
         
-        if posts:
-            posts = enhance_posts_with_comments(posts, oauth_headers)
-        
-        collection_report.append({
+        report = {
             "subreddit": sub,
             "posts_collected": len(posts),
             "coverage_percent": round((len(posts) / posts_per_sub) * 100, 1),
             "date_range_covered": f"{global_start} to {global_end}"
-        })
+        }
         
-        if posts:
-            filename = f"{sub}_data_{global_start}_to_{global_end}.csv"
-            filepath = Path(output_dir) / filename
-            
-            with open(filepath, "w", newline="", encoding="utf-8") as f:
-                w = csv.DictWriter(f, fieldnames=fieldnames)
-                w.writeheader()
-                w.writerows(posts)
-            
-            created_files.append(str(filepath))
-            total_posts += len(posts)
-            
-            dates = [p["created_date"] for p in posts if p["created_date"]]
-            unique_dates = len(set(dates))
-            
-            posts_with_comments = sum(1 for p in posts if p.get("comment_one_content"))
-            
-            print(f"  ✓ Saved to: {filepath}")
-            print(f"    Posts: {len(posts)}, Unique dates: {unique_dates}")
-            print(f"    Posts with comments: {posts_with_comments}/{len(posts)}")
-            
-            if dates:
-                earliest = min(dates)
-                latest = max(dates)
-                print(f"    Date range in data: {earliest} to {latest}")
-        else:
+        if not posts:
             print(f"  ✗ No posts found for r/{sub}")
+            if seen_db:
+                seen_db.close()
+            return report, None
+        
+        dates = set()
+        posts_with_comments = 0
+        pending_ids = []
+        if seen_db and not append:
+            # The CSV is new (or was deleted), so ids recorded for it earlier no longer count as saved
+            clear_seen_ids(seen_db, filepath)
+        
+        # Write each row as soon as its comments are fetched rather than
+        # holding every enhanced post in memory until the end
+        with open(filepath, "a" if append else "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            if not append:
+                w.writerow(fieldnames)
+            for post, comment_data in enhance_posts_with_comments(posts):
+                w.writerow((*post, *extract_comments(comment_data)))
+                if post.created_date:
+                    dates.add(post.created_date)
+                if comment_data.get("comment_one_content"):
+                    posts_with_comments += 1
+                if seen_db:
+                    pending_ids.append(post.post_id)
+                    if len(pending_ids) >= 500:
+                        f.flush()  # only mark ids seen once their rows are on disk
+                        record_seen_ids(seen_db, filepath, pending_ids)
+                        pending_ids.clear()
         
-        time.sleep(2)
+        if seen_db:
+            record_seen_ids(seen_db, filepath, pending_ids)
+            mark_csv_recorded(seen_db, filepath)
+            seen_db.close()
+        
+        print(f"  ✓ Saved to: {filepath}")
+        print(f"    Posts: {len(posts)}, Unique dates: {len(dates)}")
+        print(f"    Posts with comments: {posts_with_comments}/{len(posts)}")
+        
+        if dates:
+            earliest = min(dates)
+            latest = max(dates)
+            print(f"    Date range in data: {earliest} to {latest}")
+        
+        return report, str(filepath)
+    
+    # Subreddits are independent; run them side by side and let REQUEST_LIMITER
+    # cap the total number of in-flight requests to Reddit
+    with ThreadPoolExecutor(max_workers=max(1, len(subs))) as pool:
+        sub_results = list(pool.map(collect_one_sub, subs))
+    
+    for report, filepath in sub_results:
+        collection_report.append(report)
+        if filepath:
+            created_files.append(filepath)
+            total_posts += report["posts_collected"]
     
     # Generate comprehensive report
     print("\n=== COLLECTION REPORT ===")
@@ -614,16 +1104,19 @@ def scrape_to_csv_comprehensive(subs, global_start, global_end, output_dir="csv_
         "comment_collection": True,
         "performance_metrics": {
             "posts_per_minute": round(total_posts / total_runtime_minutes, 2) if total_runtime_minutes > 0 else 0,
-            "average_seconds_per_post": round(total_runtime_seconds / total_posts, 2) if total_posts > 0 else 0
+            "average_seconds_per_post": round(total_runtime_seconds / total_posts, 2) if total_posts > 0 else 0,
+            "api_requests": RATE_STATE.calls,
+            "last_ratelimit_remaining": RATE_STATE.remaining
         }
     }
     
-    with open(metadata_file, "w") as f:
-        json.dump(metadata, f, indent=2)
+    with open(metadata_file, "wb") as f:
+        f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
     
     print(f"\n✓ Metadata saved to: {metadata_file}")
     print(f"Total runtime: {format_duration(total_runtime_seconds)}")
     print(f"Performance: {metadata['performance_metrics']['posts_per_minute']} posts/min")
+    print(f"API requests: {RATE_STATE.calls} (rate limit remaining at end: {RATE_STATE.remaining})")
     print("\nFILES READY FOR ANALYSIS:")
     for file in created_files:
         print(f"  - {file}")
@@ -658,13 +1151,17 @@ GLOBAL_END   = "2025-07-01"
 OUTPUT_DIR = "csv_data"
 POSTS_PER_SUBREDDIT = 1000  # change this to larger number to exract more data if seeking historical data
 COMMENTS_PER_POST = 3  # Number of comments to extract per post (1-10 recommended)
+INCREMENTAL = False  # True to skip posts saved by previous runs and append new ones to the existing CSVs
 
 
 if __name__ == "__main__":
+    # Set level=logging.DEBUG to see per-request rate-limit headers and per-post progress
+    logging.basicConfig(level=logging.WARNING)
     created_files, report = scrape_to_csv_comprehensive(
         SUBREDDITS, 
         GLOBAL_START, 
         GLOBAL_END, 
         OUTPUT_DIR, 
-        POSTS_PER_SUBREDDIT
+        POSTS_PER_SUBREDDIT,
+        incremental=INCREMENTAL
     )